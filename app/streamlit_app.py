@@ -4,31 +4,32 @@
 
 # --- PATH FIX (so imports from src work correctly)
 import sys, os
-# --- PATH FIX (so imports from src work correctly)
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(BASE_DIR)
 
 FIG_DIR = os.path.join(BASE_DIR, "reports", "figures")
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+# Bump when generate_synth output changes so stale parquet files are not reused
+SYNTH_CACHE_VERSION = 2
+# Upper bound on parquet files kept in CACHE_DIR (oldest written are deleted first)
+SYNTH_CACHE_MAX_FILES = 32
 
 # --- LIBRARIES
+import glob
+import tempfile
 import streamlit as st
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import altair as alt
 
 from src.sim_core import (
     generate_synth,
-    simulate_vop,
     scan_vop,
-    simulate_fraud,
     scan_fraud
 )
 
 # --- STREAMLIT SETTINGS
 st.set_page_config(page_title="Instant Payments Readiness Simulator", layout="wide")
-plt.rcParams["figure.figsize"] = (7,3.2)
-plt.rcParams["axes.grid"] = True
 
 # =============================================================
 # HEADER
@@ -60,43 +61,156 @@ n_rows = st.sidebar.select_slider(
 
 seed = st.sidebar.number_input("Random seed", 0, 999999, value=42)
 
-vop_thr = st.sidebar.slider("VoP threshold", 0.50, 0.95, value=0.80, step=0.05)
-fraud_thr = st.sidebar.slider("Fraud threshold", 0.20, 0.90, value=0.50, step=0.10)
-
-# Grids for curves
-vop_grid = np.arange(0.50, 0.95, 0.05)
-fraud_grid = np.arange(0.20, 0.90, 0.10)
+# Grids for curves: finer for small samples (smoother curves), coarser for large ones
+fine_grid = n_rows <= 20000
+vop_grid = np.arange(0.50, 0.95 + 1e-9, 0.01 if fine_grid else 0.05)
+fraud_grid = np.arange(0.20, 0.90 + 1e-9, 0.01 if fine_grid else 0.10)
 
 # =============================================================
 # DATA (cached)
 # =============================================================
+def prune_synth_cache(keep):
+    # Seeds range over 0..999999, so keep only the `keep` most recently written datasets on disk
+    files = sorted(glob.glob(os.path.join(CACHE_DIR, "synth_*.parquet")), key=os.path.getmtime)
+    for old_path in files[:-keep]:
+        os.remove(old_path)
+
 @st.cache_data(show_spinner=False)
 def load_data(n, seed):
+    # The synthetic data is a pure function of (n, seed) -> keep it on disk across restarts
+    path = os.path.join(CACHE_DIR, f"synth_v{SYNTH_CACHE_VERSION}_{n}_{seed}.parquet")
+    if os.path.exists(path):
+        try:
+            return pd.read_parquet(path)
+        except Exception:
+            # Truncated/corrupt or unreadable (e.g. after a pyarrow upgrade) -> regenerate and overwrite
+            pass
+
     df = generate_synth(n=n, seed=seed)
-    df["is_true_fraud"] = (df["fraud_probability"] > 0.90).astype(int)
+
+    # Write to a temp file first so concurrent sessions never read a half-written parquet.
+    # The disk cache is best-effort: any failure (read-only filesystem, pyarrow error) just
+    # means no disk cache, and the temp file is always cleaned up.
+    tmp_path = None
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        os.close(fd)
+        df.to_parquet(tmp_path, compression="zstd", index=False)
+        os.replace(tmp_path, path)
+        tmp_path = None
+        prune_synth_cache(keep=SYNTH_CACHE_MAX_FILES)
+    except Exception:
+        pass
+    finally:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
     return df
 
-df = load_data(n_rows, seed)
+# Static report figures are read from disk once per server process
+@st.cache_resource(show_spinner=False)
+def load_fig_bytes(name):
+    with open(os.path.join(FIG_DIR, name), "rb") as f:
+        return f.read()
 
-# KPIs
-vop_res = simulate_vop(df, threshold=vop_thr)
-fraud_res = simulate_fraud(df, threshold=fraud_thr)
+# Curves are cached on (n, seed, grid); the current thresholds are merged into
+# the grids so the KPI snapshot is read from the same scan instead of a second pass
+@st.cache_data(show_spinner=False)
+def cached_scan_vop(n, seed, grid_key):
+    return scan_vop(load_data(n, seed), np.asarray(grid_key))
 
-vop_curves = scan_vop(df, vop_grid)
-fraud_curves = scan_fraud(df, fraud_grid)
+@st.cache_data(show_spinner=False)
+def cached_scan_fraud(n, seed, grid_key):
+    return scan_fraud(load_data(n, seed), np.asarray(grid_key))
+
+# CSV exports are serialized once per curve instead of on every rerun
+@st.cache_data(show_spinner=False)
+def cached_vop_csv(n, seed, grid_key):
+    return cached_scan_vop(n, seed, grid_key).to_csv(index=False).encode()
+
+@st.cache_data(show_spinner=False)
+def cached_fraud_csv(n, seed, grid_key):
+    return cached_scan_fraud(n, seed, grid_key).to_csv(index=False).encode()
 
 # =============================================================
-# KPI SNAPSHOT
+# SIMULATION TABS (fragments)
 # =============================================================
-st.subheader("📈 Current KPI Snapshot")
+# Each simulation tab is an st.fragment: its threshold slider lives inside it,
+# so moving the slider reruns only that tab. Changing n_rows / seed reruns everything.
+@st.fragment
+def render_vop_tab(n, seed, grid):
+    st.subheader("🎛 H3 — VoP Simulation (Conversion & Latency)")
+    st.write("Stricter VoP → fewer passes → **lower conversion** & **higher latency**.")
 
-col1,col2,col3,col4 = st.columns(4)
-col1.metric("Conversion Rate (%)", f"{vop_res['conversion_rate']:.1f}")
-col2.metric("Latency p95 (s)", f"{vop_res['latency_p95']:.2f}")
-col3.metric("Manual Review Rate (%)", f"{fraud_res['manual_review_rate']:.1f}")
-col4.metric("Risk Exposure (€)", f"{fraud_res['risk_exposure_eur']:,.0f}")
+    vop_thr = st.slider("VoP threshold", 0.50, 0.95, value=0.80, step=0.05)
+    vop_key = tuple(np.union1d(grid.round(4), round(vop_thr, 4)))
+    vop_curves = cached_scan_vop(n, seed, vop_key)
+
+    # KPIs at the current threshold
+    vop_res = vop_curves.loc[np.isclose(vop_curves["vop_threshold"], vop_thr)].iloc[0]
+    col1, col2 = st.columns(2)
+    col1.metric("Conversion Rate (%)", f"{vop_res['conversion_rate']:.1f}")
+    col2.metric("Latency p95 (s)", f"{vop_res['latency_p95']:.2f}")
+    st.caption(f"Current settings → VoP = {vop_thr:.2f}, N = {n:,}")
+
+    # Altair charts are rendered client-side (Vega), no server-side rasterization
+    st.altair_chart(
+        alt.Chart(vop_curves, title="VoP strictness → Conversion Rate")
+        .mark_line(point=True)
+        .encode(x="vop_threshold", y="conversion_rate"),
+        use_container_width=True
+    )
+    st.altair_chart(
+        alt.Chart(vop_curves, title="VoP strictness → Latency p95")
+        .mark_line(point=True)
+        .encode(x="vop_threshold", y=alt.Y("latency_p95", scale=alt.Scale(zero=False))),
+        use_container_width=True
+    )
+
+    # Compact CSV export of the curves for easy sharing
+    st.download_button(
+        label="⬇️ Download VoP curves (CSV)",
+        data=cached_vop_csv(n, seed, vop_key),
+        file_name="vop_curves.csv",
+        mime="text/csv"
+    )
+
+@st.fragment
+def render_fraud_tab(n, seed, grid):
+    st.subheader("🔐 H4 — Fraud Simulation (Risk & Manual Review)")
 
-st.caption(f"Current settings → VoP = {vop_thr:.2f}, Fraud = {fraud_thr:.2f}, N = {n_rows:,}")
+    fraud_thr = st.slider("Fraud threshold", 0.20, 0.90, value=0.50, step=0.10)
+    fraud_key = tuple(np.union1d(grid.round(4), round(fraud_thr, 4)))
+    fraud_curves = cached_scan_fraud(n, seed, fraud_key)
+
+    # KPIs at the current threshold
+    fraud_res = fraud_curves.loc[np.isclose(fraud_curves["fraud_threshold"], fraud_thr)].iloc[0]
+    col1, col2 = st.columns(2)
+    col1.metric("Manual Review Rate (%)", f"{fraud_res['manual_review_rate']:.1f}")
+    col2.metric("Risk Exposure (€)", f"{fraud_res['risk_exposure_eur']:,.0f}")
+    st.caption(f"Current settings → Fraud = {fraud_thr:.2f}, N = {n:,}")
+
+    # Two stacked charts instead of one twin-axis figure, rendered client-side
+    st.altair_chart(
+        alt.Chart(fraud_curves, title="Fraud threshold → Manual Review Rate")
+        .mark_line(point=True)
+        .encode(x="fraud_threshold", y="manual_review_rate"),
+        use_container_width=True
+    )
+    st.altair_chart(
+        alt.Chart(fraud_curves, title="Fraud threshold → Risk Exposure (€)")
+        .mark_line(point=True)
+        .encode(x="fraud_threshold", y="risk_exposure_eur"),
+        use_container_width=True
+    )
+
+    # Compact CSV export of the curves for easy sharing
+    st.download_button(
+        label="⬇️ Download Fraud curves (CSV)",
+        data=cached_fraud_csv(n, seed, fraud_key),
+        file_name="fraud_curves.csv",
+        mime="text/csv"
+    )
 
 # =============================================================
 # TABS (5 Hypothesis sections)
@@ -117,8 +231,9 @@ with tab_h1:
     st.write("Instant payments grow sharply, paper-based transfers decline → confirms digital transformation.")
 
     st.image(
-        os.path.join(FIG_DIR, "H1_stacked_sct_vs_paper.png"),
-        caption="SCT Inst vs Paper-Based (Bundesbank 2022–2024)"
+        load_fig_bytes("H1_stacked_sct_vs_paper.png"),
+        caption="SCT Inst vs Paper-Based (Bundesbank 2022–2024)",
+        use_container_width=True
     )
 
 # -----------------------------------------------------------
@@ -129,41 +244,27 @@ with tab_h2:
     st.write("Domestic electronic payments (volume & value) grow → load on banking infrastructure increases.")
 
     st.image(
-    os.path.join(FIG_DIR, "H2_total_domestic.png"),
-    caption="Domestic Transaction Volume (2022–2024)"
+        load_fig_bytes("H2_total_domestic.png"),
+        caption="Domestic Transaction Volume (2022–2024)",
+        use_container_width=True
     )
     st.image(
-        os.path.join(FIG_DIR, "H2_total_domestic_values.png"),
-        caption="Domestic Payment Values (2022–2024)"
+        load_fig_bytes("H2_total_domestic_values.png"),
+        caption="Domestic Payment Values (2022–2024)",
+        use_container_width=True
     )
 
 # -----------------------------------------------------------
 # TAB H3 — VoP Simulation
 # -----------------------------------------------------------
 with tab_h3:
-    st.subheader("🎛 H3 — VoP Simulation (Conversion & Latency)")
-    st.write("Stricter VoP → fewer passes → **lower conversion** & **higher latency**.")
-
-    fig1, ax1 = plt.subplots()
-    ax1.plot(vop_curves["vop_threshold"], vop_curves["conversion_rate"], marker="o")
-    ax1.set_title("VoP strictness → Conversion Rate")
-    st.pyplot(fig1)
-
-    fig2, ax2 = plt.subplots()
-    ax2.plot(vop_curves["vop_threshold"], vop_curves["latency_p95"], marker="o")
-    ax2.set_title("VoP strictness → Latency p95")
-    st.pyplot(fig2)
+    render_vop_tab(n_rows, seed, vop_grid)
 
 # -----------------------------------------------------------
 # TAB H4 — Fraud Simulation
 # -----------------------------------------------------------
 with tab_h4:
-    st.subheader("🔐 H4 — Fraud Simulation (Risk & Manual Review)")
-    st.image(
-        os.path.join(FIG_DIR, "H4_line_fraud_risk_exposure.png"),
-        caption="Effect of Fraud Threshold on Manual Review Rate and Risk Exposure",
-        use_container_width=True
-    )
+    render_fraud_tab(n_rows, seed, fraud_grid)
 
 # -----------------------------------------------------------
 # TAB — FINAL HEATMAP
@@ -172,7 +273,7 @@ with tab_heatmap:
     st.subheader("🌈 Final Heatmap — Optimal VoP × Fraud Balance")
 
     st.image(
-        os.path.join(FIG_DIR, "H5_heatmap_vop_fraud_optimal.png"),
+        load_fig_bytes("H5_heatmap_vop_fraud_optimal.png"),
         caption="Optimal VoP × Fraud Operating Region (Based on KPI Score)",
         use_container_width=True
     )
@@ -184,26 +285,6 @@ with tab_heatmap:
 - **Optimal region: VoP ≈ 0.80 and Fraud ≈ 0.50**
 """)
 
-# -----------------------------
-# Optional: Download helpers (for demo completeness)
-# -----------------------------
-# Provide compact CSV exports of curves for easy sharing
-dl_c1, dl_c2 = st.columns(2)
-with dl_c1:
-    st.download_button(
-        label="⬇️ Download VoP curves (CSV)",
-        data=vop_curves.to_csv(index=False),
-        file_name="vop_curves.csv",
-        mime="text/csv"
-    )
-with dl_c2:
-    st.download_button(
-        label="⬇️ Download Fraud curves (CSV)",
-        data=fraud_curves.to_csv(index=False),
-        file_name="fraud_curves.csv",
-        mime="text/csv"
-    )
-
 
 # -----------------------------------------------------------
 # FOOTER
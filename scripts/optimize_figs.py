@@ -0,0 +1,56 @@
+# =============================================================
+# One-time build step: shrink report figures for the Streamlit app
+# =============================================================
+# The notebooks export figures at high DPI (~2400 px wide), but the app never
+# shows them wider than the page. Downscale the figures the app loads to TARGET_WIDTH,
+# reduce flat-colour charts to a 256-colour palette (like pngquant) and re-save
+# without metadata, so fewer bytes are sent to the browser on every tab switch.
+# Figures only used by the notebooks/report are left at full resolution.
+#
+# Usage: python scripts/optimize_figs.py  (safe to re-run; small files are skipped)
+
+import os
+
+from PIL import Image
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+FIG_DIR = os.path.join(BASE_DIR, "reports", "figures")
+
+TARGET_WIDTH = 1200
+
+# Figures loaded by app/streamlit_app.py (load_fig_bytes) -> whether to palette-quantize.
+# Continuous colormaps (the heatmap) band without dithering, so they stay RGBA.
+APP_FIGS = {
+    "H1_stacked_sct_vs_paper.png": True,
+    "H2_total_domestic.png": True,
+    "H2_total_domestic_values.png": True,
+    "H5_heatmap_vop_fraud_optimal.png": False,
+}
+
+
+def optimize_fig(path: str, quantize: bool, target_width: int = TARGET_WIDTH) -> None:
+    """
+    Downscale one PNG to target_width (keeping aspect ratio), optionally quantize it
+    to a 256-colour palette, and re-save it optimized.
+    Figures that are already narrow enough are left untouched.
+    """
+    with Image.open(path) as img:
+        width, height = img.size
+        if width <= target_width:
+            return
+        resized = img.resize((target_width, height * target_width // width), Image.LANCZOS)
+        if quantize:
+            # Line charts use few flat colours -> a palette PNG is several times smaller than RGBA
+            resized = resized.quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+
+    # Saving without pnginfo/dpi drops the Software/dpi text chunks
+    before = os.path.getsize(path)
+    resized.save(path, format="PNG", optimize=True)
+    after = os.path.getsize(path)
+    print(f"{os.path.basename(path)}: {width}x{height} -> {resized.size[0]}x{resized.size[1]}, "
+          f"{before / 1024:.0f} KB -> {after / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    for name, quantize in APP_FIGS.items():
+        optimize_fig(os.path.join(FIG_DIR, name), quantize)
@@ -2,30 +2,89 @@ import numpy as np
 import pandas as pd
 
 # Synthetic data generator
-def generate_synth(n: int = 5000, seed: int=42, min_amount: float = 10.0, max_amount: float = 5000.0)->pd.DataFrame:
+def generate_synth(n: int = 5000, seed: int=42, min_amount: float = 10.0, max_amount: float = 5000.0, fraud_label_threshold: float = 0.90)->pd.DataFrame:
     
     """ Create a synthetic dataset of n instant payment transactions. 
     Why we need this: - Bundesbank does not provide VoP / fraud / latency fields. 
     - We simulate them to evaluate what-if scenarios. 
-    Returns columns: - transaction_id: unique id - amount_eur: payment amount in EUR - fraud_probability: estimated risk (0..1) 
-    - vop_match_score: payee-name match score (0..1) """
+    Returns columns (float32 unless noted): - transaction_id: unique id (int64) - amount_eur: payment amount in EUR - fraud_probability: estimated risk (0..1) 
+    - vop_match_score: payee-name match score (0..1) 
+    - is_true_fraud: 1 if fraud_probability > fraud_label_threshold, else 0 (uint8) """
 
     # Set seed for reproducible results
     rng = np.random.default_rng(seed)
 
-    # Generate synthetic fields
-    amounts = rng.uniform(min_amount, max_amount, n)
-    fraud_prob = rng.uniform(0.0,1.0,n)
-    vop_score = rng.uniform(0.0,1.0,n)
+    # Generate synthetic fields: one contiguous float32 draw, one row per field
+    uniforms = rng.random((3, n), dtype=np.float32)
+    amounts = min_amount + (max_amount - min_amount) * uniforms[0]
+    fraud_prob = uniforms[1]
+    vop_score = uniforms[2]
 
     df = pd.DataFrame({ 
     "transaction_id":np.arange(1, n+1),
     "amount_eur": amounts,
     "fraud_probability": fraud_prob,
-    "vop_match_score": vop_score
+    "vop_match_score": vop_score,
+    "is_true_fraud": (fraud_prob > fraud_label_threshold).astype(np.uint8)
     })
     return df
 
+# Array kernels (shared by single-threshold and scan functions)
+def _vop_kernel(vop_score: np.ndarray, thresholds: np.ndarray, base_latency_s: float, latency_slope: float)->tuple:
+    """
+    Compute VoP conversion rate and latency p95 for every threshold on raw NumPy arrays.
+    Scores are sorted once; each threshold is then a binary search (O(N log N + T log N)).
+    Returns (conversion_rate, latency_p95), one value per threshold.
+    """
+    n = len(vop_score)
+
+    # Transactions pass VoP if score >= threshold -> count everything right of the threshold
+    # (thresholds are compared in the scores' dtype, like `score >= 0.8` on a float32 column)
+    # np.sort puts NaN last; a NaN score never passes, so those rows are excluded from the count
+    score_sorted = np.sort(vop_score)
+    n_nan = int(np.isnan(score_sorted).sum())
+    n_passed = (n - n_nan) - np.searchsorted(score_sorted, thresholds.astype(score_sorted.dtype), side="left")
+    conversion_rate = n_passed / n * 100.0
+
+    # Model latency as normal noise around a mean that depends on strictness
+    # Note: higher threshold => more checks => higher mean latency
+    # The noise (seed 123) is the same for every threshold and only its mean shifts,
+    # so its p95 is computed once and shifted per threshold
+    rng = np.random.default_rng(123)
+    noise_p95 = np.percentile(rng.normal(loc=0.0, scale=0.1, size=n), 95)
+    latency_p95 = base_latency_s + (thresholds - 0.5) * latency_slope + noise_p95
+
+    return conversion_rate, latency_p95
+
+def _fraud_kernel(fraud_prob: np.ndarray, amounts: np.ndarray, thresholds: np.ndarray)->tuple:
+    """
+    Compute manual review rate and risk exposure for every threshold on raw NumPy arrays.
+    Transactions are sorted by probability once; each threshold is then a binary search
+    into the sorted order plus a lookup into the cumulative amounts.
+    Returns (manual_review_rate, risk_exposure_eur), one value per threshold.
+    """
+    n = len(fraud_prob)
+
+    # Sort by fraud probability and accumulate amounts in that order
+    # (float64 so float32 amounts still give exact-enough EUR totals)
+    order = np.argsort(fraud_prob)
+    prob_sorted = fraud_prob[order]
+    amount_cum = np.concatenate(([0.0], np.cumsum(amounts[order], dtype=np.float64)))
+
+    # Not flagged = probability <= threshold -> everything left of the threshold
+    # (thresholds are compared in the probabilities' dtype, as in vop_kernel)
+    # np.argsort puts NaN last; a NaN probability is never flagged (prob > thr is False)
+    n_nan = int(np.isnan(prob_sorted).sum())
+    n_below = np.searchsorted(prob_sorted, thresholds.astype(prob_sorted.dtype), side="right")
+    manual_review_rate = ((n - n_nan) - n_below) / n * 100.0
+
+    # Risk Exposure per threshold = sum of amounts that were NOT flagged
+    # (amounts up to the threshold plus every NaN-probability row at the end of the order)
+    nan_amount = amount_cum[n] - amount_cum[n - n_nan]
+    risk_exposure_eur = amount_cum[n_below] + nan_amount
+
+    return manual_review_rate, risk_exposure_eur
+
 # Vop simulation (H2)
 def simulate_vop(df: pd.DataFrame, threshold: float = 0.8, base_latency_s: float = 0.5, latency_slope: float=1.2)->dict:
     """
@@ -35,41 +94,31 @@ def simulate_vop(df: pd.DataFrame, threshold: float = 0.8, base_latency_s: float
     latency_slope: how much strictness adds latency Outputs: 
     - conversion_rate: % of transactions that pass VoP - latency_p95: 95th percentile latency in seconds 
     """ 
-    
-    # Compute which transactions pass VoP check
-    passed = df["vop_match_score"] >= threshold 
-
-    # Conversion is simply the share of passed transactions
-    conversion_rate = float(passed.mean() * 100.0)
-    
-    # Model latency as normal noise around a mean that depends on strictness 
-    # Note: higher threshold => more checks => higher mean latency rng = np.random.default_rng(123)
-    rng = np.random.default_rng(123)
-    
-    latency_samples = rng.normal(loc=base_latency_s + (threshold - 0.5) * latency_slope, scale=0.1, size=len(df))
-    
-    latency_p95 = float(np.percentile(latency_samples, 95))
+    conversion_rate, latency_p95 = _vop_kernel(
+        df["vop_match_score"].to_numpy(), np.array([threshold], dtype=float), base_latency_s, latency_slope
+    )
 
     return {
-        "conversion_rate": conversion_rate,
-        "latency_p95": latency_p95
+        "conversion_rate": float(conversion_rate[0]),
+        "latency_p95": float(latency_p95[0])
     }
 
-def scan_vop(df: pd.DataFrame, thresholds: np.ndarray)-> pd.DataFrame:
+def scan_vop(df: pd.DataFrame, thresholds: np.ndarray, base_latency_s: float = 0.5, latency_slope: float = 1.2)-> pd.DataFrame:
     """
     Run VoP simulation for a list/array of thresholds and return a tidy table.
+    All thresholds are evaluated in one vectorized pass (same KPIs as simulate_vop).
     """
-    # Collect results for each threshold
-    rows = []
-    for thr in thresholds:
-        # Get KPI for current threshold
-        res = simulate_vop(df, threshold=float(thr))
-        rows.append({"vop_threshold": float(thr),
-                    "conversion_rate": res["conversion_rate"],
-                    "latency_p95": res["latency_p95"]})
-    
+    thresholds = np.asarray(thresholds, dtype=float)
+    conversion_rate, latency_p95 = _vop_kernel(
+        df["vop_match_score"].to_numpy(), thresholds, base_latency_s, latency_slope
+    )
+
     # Build dataframe with results
-    return pd.DataFrame(rows)
+    return pd.DataFrame({
+        "vop_threshold": thresholds,
+        "conversion_rate": conversion_rate,
+        "latency_p95": latency_p95
+    })
 
 # Fraud filter simulation (H3)
 def simulate_fraud(df: pd.DataFrame, threshold: float = 0.5)-> dict:
@@ -83,33 +132,27 @@ def simulate_fraud(df: pd.DataFrame, threshold: float = 0.5)-> dict:
     - risk_exposure_eur: sum of amounts for transactions NOT flagged (potential loss)
     - manual_review_rate: % of transactions flagged for manual review
     """
-    # Flag transactions as suspicious if probability > threshold
-    flagged = df["fraud_probability"] > threshold
-
-    # Manual Review Rate = share of flagged transactions
-    manual_review_rate = float(flagged.mean() * 100.0)
-    
-    # Risk Exposure = sum of amounts that were NOT flagged (missed fraud risk proxy)
-    risk_exposure_eur = float(df.loc[~flagged, "amount_eur"].sum())
+    manual_review_rate, risk_exposure_eur = _fraud_kernel(
+        df["fraud_probability"].to_numpy(), df["amount_eur"].to_numpy(), np.array([threshold], dtype=float)
+    )
 
     return {
-        "risk_exposure_eur": risk_exposure_eur,
-        "manual_review_rate": manual_review_rate
+        "risk_exposure_eur": float(risk_exposure_eur[0]),
+        "manual_review_rate": float(manual_review_rate[0])
     }
 
 def scan_fraud(df: pd.DataFrame, thresholds: np.ndarray)->pd.DataFrame:
     """
     Run fraud simulation for a list/array of thresholds and return a tidy table.
+    All thresholds are evaluated in one vectorized pass (same KPIs as simulate_fraud).
     """
-    rows=[]
-    for thr in thresholds:
-        # Get KPI for current threshold
-        res = simulate_fraud(df, threshold=float(thr))
-        rows.append({
-            "fraud_threshold": float(thr),
-            "manual_review_rate": res["manual_review_rate"],
-            "risk_exposure_eur": res["risk_exposure_eur"]
-        })
-    
-    return pd.DataFrame(rows)
+    thresholds = np.asarray(thresholds, dtype=float)
+    manual_review_rate, risk_exposure_eur = _fraud_kernel(
+        df["fraud_probability"].to_numpy(), df["amount_eur"].to_numpy(), thresholds
+    )
 
+    return pd.DataFrame({
+        "fraud_threshold": thresholds,
+        "manual_review_rate": manual_review_rate,
+        "risk_exposure_eur": risk_exposure_eur
+    })
@@ -23,7 +23,7 @@ def sample_df():
 def test_generate_synth_basic(sample_df):
     
     df = sample_df
-    expected_col_names = {"transaction_id", "amount_eur", "fraud_probability", "vop_match_score"}
+    expected_col_names = {"transaction_id", "amount_eur", "fraud_probability", "vop_match_score", "is_true_fraud"}
     
     # Check length of the table
     assert len(df) == 100
@@ -36,6 +36,16 @@ def test_generate_synth_basic(sample_df):
     assert df["fraud_probability"].between(0,1).all()
     assert df["vop_match_score"].between(0,1).all()
 
+    # Check dtypes: compact float32 scores/amounts and a uint8 label
+    assert df["transaction_id"].dtype == np.int64
+    assert df["amount_eur"].dtype == np.float32
+    assert df["fraud_probability"].dtype == np.float32
+    assert df["vop_match_score"].dtype == np.float32
+    assert df["is_true_fraud"].dtype == np.uint8
+
+    # Check the fraud label is derived from the fraud probability
+    assert (df["is_true_fraud"] == (df["fraud_probability"] > 0.90)).all()
+
 # Test 2: Check simulate_vop 
 def test_simulate_vop_outputs(sample_df):
     df = sample_df
@@ -75,4 +85,68 @@ def test_scan_fraud_shape(sample_df):
     results = scan_fraud(df, thresholds)
     assert isinstance(results, pd.DataFrame)
     assert len(results) == len(thresholds)
-    assert all(col in results.columns for col in ["fraud_threshold", "manual_review_rate", "risk_exposure_eur"])
\ No newline at end of file
+    assert all(col in results.columns for col in ["fraud_threshold", "manual_review_rate", "risk_exposure_eur"])
+
+# Brute-force reference KPIs (one threshold at a time, no shared kernel)
+def reference_vop(df, threshold, base_latency_s=0.5, latency_slope=1.2):
+    score = df["vop_match_score"].to_numpy()
+    threshold = float(threshold)
+    rng = np.random.default_rng(123)
+    latency = rng.normal(loc=base_latency_s + (threshold - 0.5) * latency_slope, scale=0.1, size=len(df))
+    return (score >= threshold).mean() * 100.0, np.percentile(latency, 95)
+
+def reference_fraud(df, threshold):
+    prob = df["fraud_probability"].to_numpy()
+    threshold = float(threshold)
+    amount = df["amount_eur"].to_numpy().astype(np.float64)
+    flagged = prob > threshold
+    return flagged.mean() * 100.0, amount[~flagged].sum()
+
+# Test 6: Vectorized scans must match the brute-force reference
+def test_scans_match_reference(sample_df):
+    df = sample_df
+    vop_curves = scan_vop(df, np.arange(0.50, 0.95, 0.05))
+    for _, row in vop_curves.iterrows():
+        conversion_rate, latency_p95 = reference_vop(df, row["vop_threshold"])
+        assert np.isclose(row["conversion_rate"], conversion_rate)
+        assert np.isclose(row["latency_p95"], latency_p95)
+
+    fraud_curves = scan_fraud(df, np.arange(0.20, 0.90, 0.10))
+    for _, row in fraud_curves.iterrows():
+        manual_review_rate, risk_exposure_eur = reference_fraud(df, row["fraud_threshold"])
+        assert np.isclose(row["manual_review_rate"], manual_review_rate)
+        assert np.isclose(row["risk_exposure_eur"], risk_exposure_eur)
+
+# Test 7: Scores sitting exactly on grid values (ties) or missing (NaN) must match the reference
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_scans_handle_ties_on_grid(dtype):
+    grid = np.round(np.arange(0.20, 0.95 + 1e-9, 0.01), 2)
+    # Every grid value appears as a score/probability, plus values just below/above it and NaNs
+    values = np.concatenate([grid, np.nextafter(grid, 0), np.nextafter(grid, 1), [np.nan] * 5]).astype(dtype)
+    df = pd.DataFrame({
+        "amount_eur": np.linspace(10, 5000, len(values)).astype(dtype),
+        "fraud_probability": values,
+        "vop_match_score": values[::-1].copy()
+    })
+
+    vop_curves = scan_vop(df, grid)
+    fraud_curves = scan_fraud(df, grid)
+    for i, thr in enumerate(grid):
+        conversion_rate, _ = reference_vop(df, thr)
+        manual_review_rate, risk_exposure_eur = reference_fraud(df, thr)
+        assert vop_curves["conversion_rate"][i] == conversion_rate
+        assert fraud_curves["manual_review_rate"][i] == manual_review_rate
+        assert np.isclose(fraud_curves["risk_exposure_eur"][i], risk_exposure_eur)
+
+# Test 8: NaN scores never pass VoP and are never flagged (their amount stays at risk)
+def test_simulations_treat_nan_as_not_passing():
+    df = pd.DataFrame({
+        "amount_eur": [100.0, 100.0, 100.0, 100.0],
+        "fraud_probability": [0.9, 0.7, 0.1, np.nan],
+        "vop_match_score": [0.9, 0.85, 0.1, np.nan]
+    })
+    vop_res = simulate_vop(df, threshold=0.8)
+    fraud_res = simulate_fraud(df, threshold=0.5)
+    assert vop_res["conversion_rate"] == 50.0
+    assert fraud_res["manual_review_rate"] == 50.0
+    assert fraud_res["risk_exposure_eur"] == 200.0